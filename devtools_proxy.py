@@ -5,23 +5,133 @@ HTTP proxy for Chrome DevTools with Basic Authentication.
 import os
 import sys
 import base64
+import binascii
+import hmac
+import http.client
 import http.server
-import socketserver
-import urllib.request
-import urllib.parse
+import selectors
+import socket
+import threading
+
+# Per-thread upstream connection cache: keeps the TCP connection to the
+# internal debug port alive across proxied requests (HTTP keep-alive)
+_upstream_local = threading.local()
+
+# Refuse request bodies larger than this outright (413) so a single client
+# cannot exhaust the proxy
+MAX_BODY = 64 * 1024 * 1024
+
+
+class _BoundedReader:
+    """File-like wrapper that reads at most ``length`` bytes from ``raw``.
+
+    Lets http.client stream a request body straight off the client socket
+    without the proxy buffering it, while never reading past Content-Length.
+    """
+
+    def __init__(self, raw, length):
+        self.raw = raw
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        return data
+
+# DevTools traffic repeats the same ~15 header names, so memoize their
+# lowercased forms instead of allocating a new string per header
+_LOWER_CACHE = {}
+
+# The 401 reply never varies, so pre-serialize it once and send it with a
+# single write — the unauthorized path is the hot path under scanner traffic
+_UNAUTH_BODY = b'<html><body><h1>401 Unauthorized</h1></body></html>'
+_UNAUTH_RESPONSE = (
+    b'HTTP/1.1 401 Unauthorized\r\n'
+    b'WWW-Authenticate: Basic realm="Chrome DevTools"\r\n'
+    b'Content-Type: text/html\r\n'
+    b'Content-Length: ' + str(len(_UNAUTH_BODY)).encode('ascii') + b'\r\n'
+    b'Connection: close\r\n'
+    b'\r\n' + _UNAUTH_BODY
+)
+
+
+def _lc(name, _cache=_LOWER_CACHE):
+    value = _cache.get(name)
+    if value is None:
+        if len(_cache) > 1024:
+            _cache.clear()
+        value = _cache[name] = name.lower()
+    return value
+
+
+class ProxyServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server so one slow DevTools call does not block other clients."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def process_request(self, request, client_address):
+        # DevTools sends many small JSON frames; disabling Nagle avoids a
+        # delayed-ACK stall (up to ~40 ms) per small write. Keepalive reaps
+        # dead clients, and a bigger send buffer helps streamed bodies.
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        request.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        super().process_request(request, client_address)
+
 
 class AuthProxyHandler(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps downstream connections alive, so one handler thread
+    # serves many requests and the thread-local upstream connection is
+    # actually reused instead of dying with a per-request thread
+    protocol_version = 'HTTP/1.1'
+
+    # Headers never forwarded upstream: hop-by-hop headers plus Host (the
+    # upstream sees its own) and Authorization (consumed by the proxy).
+    # Forwarding Transfer-Encoding/Upgrade upstream would desync framing.
+    _REQ_HOP_BY_HOP = frozenset({
+        'host', 'authorization', 'connection', 'proxy-connection',
+        'keep-alive', 'upgrade', 'te', 'trailer', 'transfer-encoding',
+    })
+    # Headers never copied back to the client (the handler manages framing)
+    _RESP_HOP_BY_HOP = frozenset({
+        'connection', 'keep-alive', 'transfer-encoding', 'te', 'trailer',
+        'upgrade', 'proxy-authenticate', 'proxy-authorization',
+    })
+
     def __init__(self, *args, **kwargs):
         self.target_host = kwargs.pop('target_host', '127.0.0.1')
         self.target_port = kwargs.pop('target_port', 9223)
         self.auth_token = kwargs.pop('auth_token', None)
+        # Pre-compute the expected headers for the documented username forms
+        # ("token" and empty) so most requests skip the base64 decode entirely.
+        # Kept as bytes: compare_digest raises TypeError on non-ASCII str, and
+        # the client controls the header contents.
+        if self.auth_token:
+            self._token_bytes = self.auth_token.encode('utf-8')
+            self._expected_headers = tuple(
+                b'Basic ' + base64.b64encode(f'{user}:{self.auth_token}'.encode('utf-8'))
+                for user in ('token', '')
+            )
+        else:
+            self._token_bytes = None
+            self._expected_headers = ()
         super().__init__(*args, **kwargs)
     
     def do_GET(self):
         if not self.authenticate():
             self.send_auth_required()
             return
-        
+
+        # CDP sessions are WebSocket (ws://.../devtools/...); urllib-style
+        # proxying cannot upgrade, so splice raw sockets instead
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            self.proxy_websocket()
+            return
+
         self.proxy_request()
     
     def do_POST(self):
@@ -56,65 +166,171 @@ class AuthProxyHandler(http.server.BaseHTTPRequestHandler):
         if not self.auth_token:
             return True  # No auth required if token not set
         
-        auth_header = self.headers.get('Authorization', '')
-        if not auth_header.startswith('Basic '):
+        # http.server decodes headers as latin-1, so encoding back always
+        # succeeds and the comparisons below only ever see bytes
+        auth_header = self.headers.get('Authorization', '').encode('latin-1', 'replace')
+        for expected in self._expected_headers:
+            if hmac.compare_digest(auth_header, expected):
+                return True
+        if not auth_header.startswith(b'Basic '):
             return False
-        
+
         try:
-            encoded = auth_header.split(' ', 1)[1]
-            decoded = base64.b64decode(encoded).decode('utf-8')
-            username, password = decoded.split(':', 1)
-            
+            encoded = auth_header.split(b' ', 1)[1]
+            username, password = base64.b64decode(encoded).split(b':', 1)
+
             # Support both "token" as username with password, or just password
-            if username == 'token' and password == self.auth_token:
+            # (constant-time comparison to avoid leaking the token via timing)
+            if hmac.compare_digest(password, self._token_bytes):
                 return True
-            if username == '' and password == self.auth_token:
-                return True
-            if password == self.auth_token:
-                return True
-        except:
+        except (ValueError, binascii.Error):
             pass
-        
+
         return False
     
     def send_auth_required(self):
-        self.send_response(401)
-        self.send_header('WWW-Authenticate', 'Basic realm="Chrome DevTools"')
-        self.send_header('Content-Type', 'text/html')
-        self.end_headers()
-        self.wfile.write(b'<html><body><h1>401 Unauthorized</h1></body></html>')
+        self.close_connection = True
+        self.wfile.write(_UNAUTH_RESPONSE)
+        self.wfile.flush()
     
-    def proxy_request(self):
-        target_url = f'http://{self.target_host}:{self.target_port}{self.path}'
-        
+    def _upstream_connection(self):
+        """Get (or create) this thread's keep-alive connection to the upstream."""
+        conn = getattr(_upstream_local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.target_host, self.target_port)
+            _upstream_local.conn = conn
+        return conn
+
+    def _close_upstream(self):
+        conn = getattr(_upstream_local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            _upstream_local.conn = None
+
+    def _upstream_request(self, headers, body):
+        # The cached connection may have been closed by the upstream while
+        # idle; retry once on a fresh connection before giving up. Streamed
+        # bodies cannot be replayed, so they get a single attempt.
+        retryable = not isinstance(body, _BoundedReader)
+        for retry in (False, True):
+            conn = self._upstream_connection()
+            try:
+                conn.request(self.command, self.path, body=body, headers=headers)
+                return conn.getresponse()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                self._close_upstream()
+                if retry or not retryable:
+                    raise
+
+    def proxy_websocket(self):
+        """Forward a WebSocket upgrade to the upstream and splice the sockets."""
+        try:
+            upstream = socket.create_connection((self.target_host, self.target_port))
+        except OSError as e:
+            self.send_error(502, f"Proxy error: {str(e)}")
+            return
+
         try:
-            # Create request
-            req = urllib.request.Request(target_url)
-            
-            # Copy headers (except Host and Authorization)
+            # Re-serialize the upgrade request for the upstream, rewriting
+            # Host and dropping the proxy's own Authorization header. The
+            # Upgrade/Connection/Sec-WebSocket-* headers must pass through.
+            lines = [f'{self.command} {self.path} {self.request_version}',
+                     f'Host: {self.target_host}:{self.target_port}']
             for header, value in self.headers.items():
-                if header.lower() not in ('host', 'authorization', 'connection'):
-                    req.add_header(header, value)
-            
-            # Handle request body for POST/PUT
+                if header.lower() not in ('host', 'authorization'):
+                    lines.append(f'{header}: {value}')
+            upstream.sendall('\r\n'.join(lines).encode('latin-1') + b'\r\n\r\n')
+
+            # From here on the connection is a raw byte stream; the base
+            # handler must not try to read another HTTP request from it
+            self.close_connection = True
+            self._splice(self.connection, upstream)
+        finally:
+            upstream.close()
+
+    @staticmethod
+    def _splice(client, upstream):
+        """Pump bytes both ways until either side closes."""
+        sel = selectors.DefaultSelector()
+        sel.register(client, selectors.EVENT_READ, upstream)
+        sel.register(upstream, selectors.EVENT_READ, client)
+        try:
+            while sel.get_map():
+                for key, _ in sel.select():
+                    data = key.fileobj.recv(65536)
+                    if data:
+                        key.data.sendall(data)
+                    else:
+                        # EOF on one side: stop reading it and propagate the
+                        # half-close so in-flight data can still drain
+                        sel.unregister(key.fileobj)
+                        try:
+                            key.data.shutdown(socket.SHUT_WR)
+                        except OSError:
+                            return
+        except OSError:
+            pass
+        finally:
+            sel.close()
+
+    def proxy_request(self):
+        try:
+            # Copy headers, dropping hop-by-hop ones
+            headers = {
+                header: value
+                for header, value in self.headers.items()
+                if _lc(header) not in self._REQ_HOP_BY_HOP
+            }
+
+            # Stream the request body upstream instead of buffering it;
+            # http.client reads from the bounded wrapper in small blocks
+            body = None
             if self.command in ('POST', 'PUT'):
                 content_length = int(self.headers.get('Content-Length', 0))
+                if content_length > MAX_BODY:
+                    self.send_error(413, "Request body too large")
+                    return
                 if content_length > 0:
-                    req.data = self.rfile.read(content_length)
-            
-            # Make request
-            with urllib.request.urlopen(req) as response:
-                # Send response headers
-                self.send_response(response.getcode())
-                for header, value in response.headers.items():
-                    if header.lower() not in ('connection', 'transfer-encoding'):
-                        self.send_header(header, value)
-                self.end_headers()
-                
-                # Send response body
-                self.wfile.write(response.read())
-        
+                    body = _BoundedReader(self.rfile, content_length)
+
+            # Make request on the per-thread keep-alive connection
+            response = self._upstream_request(headers, body)
+            try:
+                # Relay status line + filtered headers as one joined buffer
+                # (single write instead of one per header)
+                head = [f'{self.protocol_version} {response.status} {response.reason}\r\n']
+                has_length = False
+                for header, value in response.getheaders():
+                    h = _lc(header)
+                    if h in self._RESP_HOP_BY_HOP:
+                        continue
+                    if h == 'content-length':
+                        has_length = True
+                    head.append(f'{header}: {value}\r\n')
+                if not has_length:
+                    # Chunked upstream bodies are relayed de-chunked, so
+                    # without a length the end is only findable by close
+                    self.close_connection = True
+                    head.append('Connection: close\r\n')
+                head.append('\r\n')
+                self.wfile.write(''.join(head).encode('latin-1'))
+
+                # Stream response body through one reusable buffer; readinto
+                # avoids allocating a fresh bytes object per 64 KiB chunk
+                buf = bytearray(65536)
+                view = memoryview(buf)
+                while True:
+                    n = response.readinto(buf)
+                    if not n:
+                        break
+                    self.wfile.write(view[:n])
+                self.wfile.flush()
+            finally:
+                # Fully-read responses leave the connection reusable
+                response.close()
+
         except Exception as e:
+            self._close_upstream()
             self.send_error(502, f"Proxy error: {str(e)}")
     
     def log_message(self, format, *args):
@@ -140,7 +356,7 @@ def main():
         **kwargs
     )
     
-    with socketserver.TCPServer(("0.0.0.0", listen_port), handler) as httpd:
+    with ProxyServer(("0.0.0.0", listen_port), handler) as httpd:
         httpd.serve_forever()
 
 if __name__ == '__main__':
@@ -13,18 +13,42 @@ from __future__ import annotations
 
 import argparse
 import base64
+import binascii
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 import os
 import pathlib
+import random
+import re
 import sys
 import time
-from typing import Any, Iterable, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Set, Tuple
 
-import requests
+if TYPE_CHECKING:
+    import requests
 
 
 RETRYABLE_STATUSES_DEFAULT: Set[int] = {429, 500, 502, 503, 504}
 
+_SESSION: Optional["requests.Session"] = None
+
+
+def _session() -> "requests.Session":
+    """
+    Shared session so login + PATCH + diagnostics reuse one pooled TLS
+    connection to hub.docker.com instead of a fresh handshake per call.
+    Imported lazily so --help and argument errors don't pay the ~60 ms
+    requests import cost.
+    """
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        _SESSION = requests.Session()
+        _SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10))
+    return _SESSION
+
 
 def request_with_retries(
     method: str,
@@ -42,21 +66,26 @@ def request_with_retries(
     retry_statuses = retry_statuses or RETRYABLE_STATUSES_DEFAULT
 
     last_exc: Optional[BaseException] = None
+    kwargs.setdefault("stream", True)
     for attempt in range(1, max_attempts + 1):
         try:
-            resp = requests.request(method, url, timeout=timeout, **kwargs)
+            resp = _session().request(method, url, timeout=timeout, **kwargs)
             if resp.status_code in retry_statuses:
-                body_preview = (resp.text or "")[:500]
+                # Read a bounded preview for the log instead of decoding an
+                # arbitrarily large error body (CDN 502 pages can be huge).
+                body_preview = resp.raw.read(500, decode_content=True).decode("utf-8", "replace")
+                resp.close()
                 raise RuntimeError(f"retryable_status={resp.status_code} body={body_preview}")
             return resp
         except Exception as e:  # noqa: BLE001 - ok in a CLI script
             last_exc = e
             if attempt == max_attempts:
                 raise
-            sleep_s = min(30, 2**attempt)
+            # Full jitter so parallel CI jobs don't retry in lockstep
+            sleep_s = random.uniform(0, min(30, 2**attempt))
             print(
                 f"WARN: request failed ({attempt}/{max_attempts}) {method} {url}: {e}. "
-                f"Retrying in {sleep_s}s...",
+                f"Retrying in {sleep_s:.1f}s...",
                 flush=True,
             )
             time.sleep(sleep_s)
@@ -74,31 +103,40 @@ def print_connectivity_diagnostics() -> None:
         ("docker_registry_v2", "https://registry-1.docker.io/v2/"),
         ("docker_status", "https://www.dockerstatus.com/api/v2/status.json"),
     ]
-    for name, url in checks:
-        try:
-            r = requests.get(url, timeout=10)
-            preview = (r.text or "")[:200].replace("\n", "\\n")
-            print(f"DIAG: {name} status={r.status_code} url={url} body_preview={preview}", flush=True)
-        except Exception as e:  # noqa: BLE001
-            print(f"DIAG: {name} error={e} url={url}", flush=True)
+    # Probes are independent and I/O-bound; run them in parallel so the
+    # failure path is bounded by the slowest probe, not the sum of all three.
+    session = _session()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = {executor.submit(session.get, url, timeout=10): (name, url) for name, url in checks}
+        for future in as_completed(futures):
+            name, url = futures[future]
+            try:
+                r = future.result()
+                preview = (r.text or "")[:200].replace("\n", "\\n")
+                print(f"DIAG: {name} status={r.status_code} url={url} body_preview={preview}", flush=True)
+            except Exception as e:  # noqa: BLE001
+                print(f"DIAG: {name} error={e} url={url}", flush=True)
+
+
+# Very lightweight heuristic: JWTs typically have 3 dot-separated segments.
+_JWT_RE = re.compile(r"[^.]+\.[^.]+\.[^.]+").fullmatch
 
 
 def _looks_like_jwt(token: str) -> bool:
-    # Very lightweight heuristic: JWTs typically have 3 dot-separated segments.
-    if not token or not isinstance(token, str):
-        return False
-    parts = token.split(".")
-    return len(parts) == 3 and all(parts)
+    return isinstance(token, str) and bool(_JWT_RE(token))
 
 
-def _load_json_file(path: pathlib.Path) -> Optional[dict[str, Any]]:
+def _load_json_file(path: str) -> Optional[dict[str, Any]]:
     try:
-        if not path.exists():
+        # Expand/resolve lazily so callers that never reach the file
+        # fallback don't pay for path resolution or stat calls.
+        resolved = pathlib.Path(os.path.expanduser(path))
+        if not resolved.exists():
             return None
-        with path.open("r", encoding="utf-8") as f:
+        with resolved.open("r", encoding="utf-8") as f:
             data = json.load(f)
         return data if isinstance(data, dict) else None
-    except Exception:  # noqa: BLE001 - best-effort local loading
+    except (OSError, json.JSONDecodeError):  # best-effort local loading
         return None
 
 
@@ -165,15 +203,15 @@ def _extract_from_docker_config(cfg: dict[str, Any]) -> Tuple[Optional[str], Opt
                 continue
             username, password = decoded.split(":", 1)
             return username or None, password or None
-        except Exception:  # noqa: BLE001
+        except (binascii.Error, UnicodeDecodeError):
             continue
 
     return None, None
 
 
 def load_dockerhub_credentials(
-    dockerhub_config_path: pathlib.Path,
-    docker_config_path: pathlib.Path,
+    dockerhub_config_path: str,
+    docker_config_path: str,
 ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     Load Docker Hub credentials from common local config locations.
@@ -221,19 +259,13 @@ def main() -> int:
         print("ERROR: missing required env var: IMAGE_NAME", file=sys.stderr)
         return 1
 
-    with open(args.readme, "r", encoding="utf-8") as f:
-        readme_content = f.read()
-
     # Prefer env vars (CI), but allow local config fallback (~/.dockerhub, ~/.docker).
     username = os.environ.get("DOCKERHUB_USERNAME")
     password = os.environ.get("DOCKERHUB_TOKEN")
     jwt_token = os.environ.get("DOCKERHUB_JWT")
 
     if not username or (not password and not jwt_token):
-        u2, p2, jwt2 = load_dockerhub_credentials(
-            pathlib.Path(os.path.expanduser(args.dockerhub_config)).resolve(),
-            pathlib.Path(os.path.expanduser(args.docker_config)).resolve(),
-        )
+        u2, p2, jwt2 = load_dockerhub_credentials(args.dockerhub_config, args.docker_config)
         username = username or u2
         password = password or p2
         jwt_token = jwt_token or jwt2
@@ -277,10 +309,15 @@ def main() -> int:
     # Update Docker Hub repository description using JWT token
     repo_url = f"https://hub.docker.com/v2/repositories/{username}/{image_name}/"
     headers = {"Content-Type": "application/json", "Authorization": f"JWT {jwt_token}"}
-    data = {"full_description": readme_content}
+    # Encode the body once; letting requests re-serialize a dict per retry
+    # attempt would hold the README in memory three times over.
+    body = json.dumps(
+        {"full_description": pathlib.Path(args.readme).read_text(encoding="utf-8")},
+        ensure_ascii=False,
+    ).encode("utf-8")
 
     try:
-        response = request_with_retries("PATCH", repo_url, headers=headers, json=data)
+        response = request_with_retries("PATCH", repo_url, headers=headers, data=body)
     except Exception as e:  # noqa: BLE001
         print(f"WARN: Docker Hub README update failed after retries: {e}", flush=True)
         print("WARN: Skipping README sync failure (image already pushed).", flush=True)
@@ -2,13 +2,102 @@
 Pytest configuration and fixtures.
 """
 import pytest
+import random
+import socket
 import subprocess
+import time
 import os
 
 
+# Resolved once at import; the token cannot change mid-session
+DEVTOOLS_TOKEN = os.environ.get("DEVTOOLS_TOKEN")
+
+
 def pytest_configure(config):
     """Configure pytest markers."""
     config.addinivalue_line(
         "markers", "integration: marks tests as integration tests"
     )
 
+
+@pytest.fixture(scope="session")
+def container_name():
+    """Container name for testing."""
+    return "test-remote-browser"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _require_container(container_name):
+    """Skip the whole session up front when the container isn't running.
+
+    Without this, a dev machine without the container burns the full retry
+    budget of every test before failing.
+    """
+    try:
+        result = subprocess.run(
+            ["docker", "inspect", "-f", "{{.State.Running}}", container_name],
+            capture_output=True, text=True
+        )
+    except OSError:
+        pytest.skip("docker is not available")
+    if result.returncode != 0 or result.stdout.strip() != "true":
+        pytest.skip(f"Container {container_name} is not running")
+
+
+@pytest.fixture(scope="session")
+def http_session():
+    """Shared HTTP session so polling attempts reuse one TCP connection."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=4))
+
+    # Pre-compute the Basic auth header once; HTTPBasicAuth would re-encode
+    # it on every request the session makes
+    if DEVTOOLS_TOKEN:
+        import base64
+        session.headers["Authorization"] = (
+            "Basic " + base64.b64encode(f"token:{DEVTOOLS_TOKEN}".encode()).decode()
+        )
+
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def wait_for_services(_require_container, http_session):
+    """Wait until the container ports actually answer instead of sleeping blindly.
+
+    Session-scoped and autouse so all test modules share one readiness check.
+    """
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    def probe_vnc():
+        with socket.create_connection(('localhost', 5900), timeout=0.5):
+            return True
+
+    def probe_devtools():
+        # /json/version is a tiny static document; unlike /json it does
+        # not make Chrome enumerate and serialize every open target
+        return http_session.get("http://localhost:9222/json/version", timeout=(0.5, 1.0)).status_code == 200
+
+    # Wall-clock deadline bounds the worst case at 30 s; the (connect, read)
+    # timeout pair lets connection-refused fail fast while still giving the
+    # server a second to produce JSON. The two probes are independent, so
+    # each round costs max(vnc, devtools) rather than their sum.
+    deadline = time.monotonic() + 30
+    attempt = 0
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        while time.monotonic() < deadline:
+            futures = [executor.submit(probe_vnc), executor.submit(probe_devtools)]
+            try:
+                if all(future.result() for future in futures):
+                    return
+            except (OSError, requests.exceptions.RequestException):
+                pass
+            # Jittered exponential backoff so parallel workers don't probe in lockstep
+            time.sleep(min(1.0, 0.05 * (2 ** attempt)) * (0.5 + random.random()))
+            attempt += 1
+    pytest.fail("Container services did not become ready within 30s")